@@ -1,4 +1,34 @@
-from .meters import NevaMT324AOS, NevaMT324R
-from .tools import start_without_model
+from typing import TYPE_CHECKING
 
 __version__ = "0.7.51"
+
+# Meter classes pull in pyserial, so they are imported on first access only
+# (`python -m pyneva --help` does not need them).
+_lazy_attrs = {
+    "NevaMT324AOS": "meters",
+    "NevaMT324R": "meters",
+    "start_without_model": "tools",
+    "AsyncMeter": "aio",
+    "MeterPool": "core",
+}
+
+__all__ = ["__version__", *_lazy_attrs]
+
+if TYPE_CHECKING:
+    from .aio import AsyncMeter
+    from .core import MeterPool
+    from .meters import NevaMT324AOS, NevaMT324R
+    from .tools import start_without_model
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attrs:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f".{_lazy_attrs[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attrs))
@@ -1,68 +1,103 @@
 import argparse
 import sys
+from typing import Callable
 
 from . import __version__
-from . import meters
-from . import tools
-from .types import MeterConnectionError, ResponseError
-
-
-def is_property(klass, attr: str) -> bool:
-    return type(getattr(klass, attr)) == property and "__" not in attr
 
 
 connect_description = "\033[31mAttention! Raw OBIS commands are much slower than " \
                       "prepared values.\nCLI version does not support write mode!\033[0m"
+
+
+def formatter(prog: str) -> argparse.HelpFormatter:
+    return argparse.RawDescriptionHelpFormatter(prog, max_help_position=40)
+
+
+def build_connect(subparsers, name: str, help_: str):
+    connect = subparsers.add_parser(
+        name, help=help_, description=connect_description, formatter_class=formatter,
+        usage="%(prog)s -i INTERFACE -m MODEL [-b BAUDRATE] [-a ADDRESS] [-p PASSWORD] "
+              "[-v [value(-s)]] [--obis [code(-s)]] [--pipelined]"
+    )
+    connect.set_defaults(parser=connect)
+
+    connect.add_argument("-i", "--interface", required=True,
+                         help="serial interface (can be RFC2217 uri)")
+    connect.add_argument("-m", "--model", required=True,
+                         help="meter class (can be obtained from the command `get-model`)")
+    connect.add_argument("-b", "--baudrate", default=300, type=int,
+                         help="initial baudrate (default: 300), specify 9600 for RS485")
+    connect.add_argument("-a", "--addr", dest="address", default="", help="meter address")
+    connect.add_argument("-p", "--password", dest="password", default="",
+                         help="meter password")
+    connect.add_argument("-v", "--val", nargs='*', default="", metavar="",
+                         help="prepared value(-s). The available values for your meter can be "
+                              "obtained from the command `get-values`")
+    connect.add_argument("--obis", nargs='*', default="", metavar="",
+                         help="raw OBIS code(-s), format: XX.XX.XX*XX")
+    connect.add_argument("--pipelined", action="store_true",
+                         help="send all OBIS requests at once (the meter must support it)")
+
+
+def build_get_model(subparsers, name: str, help_: str):
+    get_model = subparsers.add_parser(
+        name, help=help_, usage="%(prog)s -i INTERFACE [-b BAUDRATE] [-a ADDRESS]",
+        formatter_class=formatter,
+    )
+    get_model.set_defaults(parser=get_model)
+    get_model.add_argument("-i", "--interface", required=True,
+                           help="serial interface (can be RFC2217 uri)")
+    get_model.add_argument("-b", "--baudrate", default=300, type=int,
+                           help="initial baudrate (default: 300), specify 9600 for RS485")
+    get_model.add_argument("-a", "--addr", dest="address", default="", help="meter address")
+
+
+def build_get_values(subparsers, name: str, help_: str):
+    get_values = subparsers.add_parser(name, help=help_, formatter_class=formatter)
+    get_values.set_defaults(parser=get_values)
+    get_values.add_argument("-m", "--model", required=True,
+                            help="meter class (can be obtained from the command `get-model`)")
+
+
+subcommands = {
+    "connect": (build_connect, "connect help"),
+    "get-model": (build_get_model, "get-model help"),
+    "get-values": (build_get_values, "get-values help"),
+}
+
 parser = argparse.ArgumentParser(prog='pyneva',
                                  formatter_class=argparse.RawDescriptionHelpFormatter)
 parser.add_argument("-v", "--version", action='version', version=f"%(prog)s {__version__}")
 
 subparsers = parser.add_subparsers()
 
-connect = subparsers.add_parser(
-    'connect', help='connect help', description=connect_description,
-    formatter_class=lambda prog: argparse.RawDescriptionHelpFormatter(prog, max_help_position=40),
-    usage="%(prog)s -i INTERFACE -m MODEL [-b BAUDRATE] [-a ADDRESS] [-p PASSWORD] "
-          "[-v [value(-s)]] [--obis [code(-s)]]"
-)
-connect.set_defaults(parser=connect)
-
-connect.add_argument("-i", "--interface", required=True,
-                     help="serial interface (can be RFC2217 uri)")
-connect.add_argument("-m", "--model", required=True,
-                     help="meter class (can be obtained from the command `get-model`)")
-connect.add_argument("-b", "--baudrate", default=300, type=int,
-                     help="initial baudrate (default: 300), specify 9600 for RS485")
-connect.add_argument("-a", "--addr", dest="address", default="", help="meter address")
-connect.add_argument("-p", "--password", dest="password", default="", help="meter password")
-connect.add_argument("-v", "--val", nargs='*', default="", metavar="",
-                     help="prepared value(-s). The available values for your meter can be "
-                          "obtained from the command `get-values`")
-connect.add_argument("--obis", nargs='*', default="", metavar="",
-                     help="raw OBIS code(-s), format: XX.XX.XX*XX")
-
-get_model = subparsers.add_parser(
-    'get-model', help='get-model help', usage="%(prog)s -i INTERFACE [-b BAUDRATE] [-a ADDRESS]",
-    formatter_class=lambda prog: argparse.RawDescriptionHelpFormatter(prog, max_help_position=40),
-)
-get_model.set_defaults(parser=get_model)
-get_model.add_argument("-i", "--interface", required=True,
-                       help="serial interface (can be RFC2217 uri)")
-get_model.add_argument("-b", "--baudrate", default=300, type=int,
-                       help="initial baudrate (default: 300), specify 9600 for RS485")
-get_model.add_argument("-a", "--addr", dest="address", default="", help="meter address")
-
-get_values = subparsers.add_parser(
-    'get-values', help='get-values help',
-    formatter_class=lambda prog: argparse.RawDescriptionHelpFormatter(prog, max_help_position=40))
-get_values.set_defaults(parser=get_values)
-get_values.add_argument("-m", "--model", required=True,
-                        help="meter class (can be obtained from the command `get-model`)")
+# Only the invoked subcommand gets its arguments, the rest are registered
+# bare so that they are still listed in the help and accepted as choices
+selected = next((arg for arg in sys.argv[1:] if not arg.startswith("-")), None)
+for name, (build, help_) in subcommands.items():
+    if name == selected:
+        build(subparsers, name, help_)
+    else:
+        subparsers.add_parser(name, help=help_)
 
 args = parser.parse_args()
 
 fn = args.parser.prog.split()[1]
 
+# Imported only after parsing: `--help` and usage errors do not need pyserial
+from . import meters
+from . import tools
+from .types import DataMsg, MeterConnectionError, ResponseError
+
+
+def value_line(meter, name: str, get: Callable) -> str:
+    # An unsupported value does not hide the ones that were read
+    try:
+        return f"{name}\t {get(meter)}"
+    except ResponseError as e:
+        return f"{name}\t {type(e).__name__}: {e}"
+
+
 cls = meters.NevaMT3R
 if fn in ("connect", "get-values"):
     cls = vars(meters)[args.model]
@@ -73,28 +108,36 @@ if fn == "get-model":
     print("Class that you need:", klass.__name__)
 
 if fn == "get-values":
-    values = frozenset(filter(lambda x: is_property(cls, x), dir(cls)))
-    print(f"Possible values are {', '.join(sorted(values))}. But some may not be supported by "
-          f"your meter")
+    print(f"Possible values are {', '.join(cls.prepared_values)}. "
+          f"But some may not be supported by your meter")
 if fn == "connect":
     if len(args.obis) == 0 and len(args.val) == 0:
-        parser.error("at least one of --obis and --val required")
+        args.parser.error("at least one of --obis and --val required")
+
+    # Getters are looked up once, so unknown values are rejected before connecting
+    unknown = [name for name in args.val if name not in cls.prepared_values]
+    if unknown:
+        args.parser.error(f"unknown value(-s) for {cls.__name__}: {', '.join(unknown)}")
+    # A list, so that a value repeated in --val is printed each time
+    getters = [(name, getattr(cls, name).__get__) for name in args.val]
 
     try:
         with cls(interface=args.interface, address=args.address, password=args.password,
-                 initial_baudrate=args.baudrate) as meter:
+                 initial_baudrate=args.baudrate, pipelined=args.pipelined) as meter:
             print(f"Connected to: {meter}")
 
+            # Each section is written at once instead of a print per line
             if len(args.val) != 0:
-                print("\nValues:")
-                for func in args.val:
-                    print(f"{func}\t", getattr(meter, func))
+                lines = [value_line(meter, name, get) for name, get in getters]
+                sys.stdout.write("\nValues:\n" + "\n".join(lines) + "\n")
 
             if len(args.obis) != 0:
-                print("\nOBIS:")
-                for code in args.obis:
-                    meter.send(tools.make_cmd_msg(code))
-                    print(f"{code}\t", tools.parse_data_msg(meter.recv()).data)
-    except (MeterConnectionError, ResponseError, AttributeError) as e:
+                # An unsupported code does not hide the ones that answered
+                msgs = meter.read_many(args.obis, return_errors=True)
+                lines = [f"{code}\t {msg.data}" if isinstance(msg, DataMsg)
+                         else f"{code}\t {type(msg).__name__}: {msg}"
+                         for code, msg in zip(args.obis, msgs)]
+                sys.stdout.write("\nOBIS:\n" + "\n".join(lines) + "\n")
+    except (MeterConnectionError, ResponseError) as e:
         # sys.stderr.write(f"\n\033[31m{e.__class__.__name__}: {e}\033[0m\n")
         sys.stderr.write(f"\n\033[31m{type(e).__name__}: {e}\033[0m\n")
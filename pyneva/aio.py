@@ -0,0 +1,49 @@
+"""Asyncio interface to the meters.
+
+The meter line is half duplex, so the requests of one meter are still sent one
+after another in the worker thread of the meter. Awaiting them does not block
+the event loop, which can poll other meters meanwhile.
+"""
+import asyncio
+from typing import Any, Callable
+
+from .core import MeterBase
+from .types import DataMsg
+
+
+class AsyncMeter:
+    """Awaitable wrapper over a meter object.
+
+    Usage:
+        async with AsyncMeter(NevaMT324AOS("/dev/ttyUSB0")) as meter:
+            voltage = await meter.read("voltage")
+    """
+
+    def __init__(self, meter: MeterBase):
+        self.meter = meter
+
+    async def read(self, name: str) -> Any:
+        """Return the prepared value by name (see the prepared_values of the meter)."""
+        if name not in self.meter.prepared_values:
+            raise AttributeError(f"{type(self.meter).__name__} has no prepared value {name!r}")
+        return await self.__run(getattr, self.meter, name)
+
+    async def read_many(self, obis_codes: list[str]) -> tuple[DataMsg, ...]:
+        """Read several raw OBIS codes, return parsed data messages."""
+        return await asyncio.wrap_future(self.meter.submit(*obis_codes))
+
+    async def __run(self, fn: Callable, *args) -> Any:
+        return await asyncio.wrap_future(self.meter.run_in_background(fn, *args))
+
+    async def __aenter__(self):
+        # Not in the worker thread of the meter: a failed sign-on closes the meter,
+        # which waits for the worker to finish
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.meter.start_session)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        # Not in the worker thread of the meter: both calls wait for it to finish
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.meter.close_session)
+        await loop.run_in_executor(None, self.meter.close)
@@ -1,13 +1,28 @@
-from collections import namedtuple
-from datetime import datetime
-from time import sleep
+from contextlib import ExitStack
+from datetime import date, datetime, time
+from threading import Lock
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Union
 
 import serial
-from serial.rfc2217 import Serial as rfc2217Serial
 
 from . import tools
 from .types import OBISCodes, ResponseError, MeterConnectionError, SeasonalSchedule, \
-    SpecialDaysSchedule, TariffSchedule, TariffSchedulePart, ActiveEnergy
+    SpecialDaysSchedule, TariffSchedule, TariffSchedulePart, ActiveEnergy, DataMsg
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+_Schedule = Union[SeasonalSchedule, SpecialDaysSchedule]
+
+
+def float_property(name: str, doc: str) -> property:
+    """Return property reading the first value of the response to the prepared
+    command by name as float.
+    """
+    def fget(self: "MeterBase") -> float:
+        return float(self._read(name)[0])
+    return property(fget, doc=doc)
 
 
 class MeterBase:
@@ -16,10 +31,13 @@ class MeterBase:
     """
 
     __baudrates = (300, 600, 1200, 2400, 4800, 9600)
-    __timeout = 3
-    __serial_num = None
-    __device_identifier = None
-    __used_tariff_schedules = set()
+    # Acknowledgement messages (programming mode) by the baudrate number
+    __acks = tuple(b"\x060%i1\r\n" % num for num in range(len(__baudrates)))
+    # The meter may take up to 1.5 s to start replying (IEC 61107)
+    __response_time = 1.5
+    # Chars a read may wait for, the frames are read in parts as they arrive
+    __gap_chars = 3
+    __cache_ttl = 3600
     obis_codes = OBISCodes(serial_num="60.01.00*FF", date="00.09.02*FF", time="00.09.01*FF",
                            address="60.01.01*FF", status="60.05.00*FF", temperature="60.09.00*FF",
                            seasonal_schedules="0D.00.00*FF", special_days_schedules="0B.00.00*FF",
@@ -42,37 +60,69 @@ class MeterBase:
                            positive_reactive_power_sum="03.07.01*FF",
                            negative_reactive_power_sum="04.07.01*FF")
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.prepared_values = _collect_prepared_values(cls)
+        if "obis_codes" in vars(cls):
+            cls._commands = _make_commands(cls.obis_codes)
+            cls._tariff_commands = _make_tariff_commands(cls.obis_codes.tariff_schedule)
+
     def __init__(self, interface: str, address: str = "", password: str = "",
-                 initial_baudrate: int = 0):
+                 initial_baudrate: int = 0, pipelined: bool = False, low_latency: bool = True,
+                 timeout: float = 3):
         if initial_baudrate == 0:
             initial_baudrate = self.__baudrates[0]
         self.__interface = interface
         self.__address = address
+        self.__id_request = b"/?%s!\r\n" % address.encode("ascii")
         self.__password = password.encode("ascii")
         self.__init_baudrate = initial_baudrate
+        self.__pipelined = pipelined
+        self.__low_latency = low_latency
+        # Read timeout until the sign-on, it also caps the one at the working baudrate
+        self.__timeout = timeout
+        self.__device_identifier = None
+        self.__serial_num = None
+        self.__used_tariff_schedules = {}
+        self.__cache = {}
+        self.__rx_buffer = bytearray()
+        # Held for every exchange, so the calls from several threads do not mix on the line
+        self.__lock = Lock()
+        self.__executor = None
         self.__session = serial.serial_for_url(self.__interface, do_not_open=True,
                                                baudrate=self.__init_baudrate,
                                                bytesize=serial.SEVENBITS,
                                                parity=serial.PARITY_EVEN,
                                                stopbits=serial.STOPBITS_ONE,
                                                timeout=self.__timeout)
-        self.__is_rfc2217 = isinstance(self.__session, rfc2217Serial)
+        # Checked by the URL scheme, so serial.rfc2217 is only imported (by pyserial)
+        # when it is actually used
+        self.__is_rfc2217 = interface.lower().startswith("rfc2217://")
 
     def start_session(self):
         """Starting serial session according to protocol IEC 61107 in programming mode."""
+        # The schedules may have been reprogrammed since the last session
+        self.invalidate_cache()
         self.__session.open()
+        self.__set_low_latency_mode()
 
         # Send request message
-        self.send(b"/?%s!\r\n" % self.__address.encode("ascii"))
+        self.send(self.__id_request)
 
         working_baudrate_num = self.__read_id_msg()
 
         # Send acknowledgement message, programming mode
-        self.send(b"\x060%i1\r\n" % working_baudrate_num)
+        ack_msg = self.__acks[working_baudrate_num]
+        self.send(ack_msg)
 
-        # Change baudrate
-        sleep(.3)
-        self.__session.baudrate = self.__baudrates[working_baudrate_num]
+        # Change baudrate once the ACK has left the port: flush does not wait for the
+        # UART of every adapter (nor for the remote one over RFC2217), so the ACK
+        # wire time (10 bits per char) is waited out as well
+        self.__session.flush()
+        sleep(len(ack_msg) * 10 / self.__session.baudrate)
+        baudrate = self.__baudrates[working_baudrate_num]
+        self.__session.baudrate = baudrate
+        self.__session.timeout = self._read_timeout(baudrate)
 
         self.__read_password_msg()
 
@@ -81,14 +131,52 @@ class MeterBase:
 
         self.__read_ack_msg()
 
+    def _read_timeout(self, baudrate: int) -> float:
+        """Return the timeout of a read at the working baudrate: the response
+        time and a few chars (10 bits each), but no more than the initial timeout.
+        """
+        return min(self.__timeout, self.__response_time + self.__gap_chars * 10 / baudrate)
+
+    def __set_low_latency_mode(self):
+        """Ask the driver to pass short reads through at once (the FTDI latency
+        timer holds them for 16 ms by default). It is a no-op if low_latency
+        is disabled, for RFC2217 sessions and for drivers or platforms that do
+        not support it.
+        """
+        if not self.__low_latency or self.__is_rfc2217 \
+                or not hasattr(self.__session, "set_low_latency_mode"):
+            return
+        try:
+            self.__session.set_low_latency_mode(True)
+        except (ValueError, NotImplementedError, OSError):
+            pass
+
+    def _cached(self, key: Hashable, fetch: Callable[[], Any], ttl: float = None) -> Any:
+        """Return the value cached by key, call fetch if there is no value or
+        it is older than ttl seconds (an hour by default).
+        """
+        now = monotonic()
+        entry = self.__cache.get(key)
+        if entry is None or now - entry[0] > (self.__cache_ttl if ttl is None else ttl):
+            entry = self.__cache[key] = (now, fetch())
+        return entry[1]
+
+    def invalidate_cache(self):
+        """Drop the cached schedules, so they will be read from the meter again."""
+        self.__cache.clear()
+        # The schedule numbers are collected again from the seasonal and special days schedules
+        self.__used_tariff_schedules.clear()
+
     @property
     def seasonal_schedules(self) -> tuple[SeasonalSchedule, ...]:
         """Return tuple with seasonal schedules.
         Each schedule specifies from which date the tariff starts,
         and the numbers of tariff schedules on weekdays, Saturdays, Sundays separately.
         """
-        self.send(tools.make_cmd_msg(self.obis_codes.seasonal_schedules))
-        schedules = tools.parse_data_msg(self.recv(144)).data
+        return self._cached("seasonal_schedules", self.__read_seasonal_schedules)
+
+    def __read_seasonal_schedules(self) -> tuple[SeasonalSchedule, ...]:
+        schedules = self._read("seasonal_schedules")
         schedules = tools.parse_schedules(schedules)
         schedules = tuple(
             self.__parse_into_used_schedules(SeasonalSchedule, skd, (2, 3, 4)) for skd in schedules
@@ -100,18 +188,31 @@ class MeterBase:
         """Return tuple with special days schedules.
         Each schedule includes date and tariff schedule number.
         """
-        self.send(tools.make_cmd_msg(self.obis_codes.special_days_schedules))
-        days = tools.parse_data_msg(self.recv(236)).data
+        return self._cached("special_days_schedules", self.__read_special_days_schedules)
+
+    def __read_special_days_schedules(self) -> tuple[SpecialDaysSchedule, ...]:
+        days = self._read("special_days_schedules")
         days = tools.parse_schedules(days)
         days = tuple(
-            self.__parse_into_used_schedules(SpecialDaysSchedule, skd, (3,)) for skd in days
+            self.__parse_into_used_schedules(SpecialDaysSchedule, skd, (2,)) for skd in days
         )
         return days
 
-    def __parse_into_used_schedules(self, struct: namedtuple, skd: tuple[int, ...],
-                                    nums: tuple[int, ...]) -> namedtuple:
-        self.__used_tariff_schedules.update(map(lambda i: skd[i], nums))
-        return struct(*skd)
+    def __parse_into_used_schedules(self, struct: type[_Schedule], skd: tuple[int, ...],
+                                    nums: tuple[int, ...]) -> _Schedule:
+        for i in nums:
+            self.__add_used_tariff_schedule(skd[i])
+        return struct._make(skd)
+
+    def __add_used_tariff_schedule(self, schedule_num: int):
+        """Remember the tariff schedule number with its command message."""
+        if schedule_num in self.__used_tariff_schedules:
+            return
+        command = self._tariff_commands.get(schedule_num)
+        if command is None:
+            schedule_obis = self.obis_codes.tariff_schedule % f"{schedule_num:02X}"
+            command = tools.make_cmd_msg(schedule_obis)
+        self.__used_tariff_schedules[schedule_num] = command
 
     @property
     def tariff_schedules(self) -> tuple[TariffSchedule, ...]:
@@ -121,13 +222,16 @@ class MeterBase:
         and tariff number.
         """
         if not self.__used_tariff_schedules:
-            self.__used_tariff_schedules.add(1)
+            self.__add_used_tariff_schedule(1)
+        # The set of schedules grows when the seasonal or special days schedules are read
+        key = ("tariff_schedules", frozenset(self.__used_tariff_schedules))
+        return self._cached(key, self.__read_tariff_schedules)
+
+    def __read_tariff_schedules(self) -> tuple[TariffSchedule, ...]:
         tariff_schedules = []
-        for schedule_num in self.__used_tariff_schedules:
-            schedule_obis = self.obis_codes.tariff_schedule % f"{schedule_num:02X}"
-            self.send(tools.make_cmd_msg(schedule_obis))
-            schedule = tools.parse_schedules(tools.parse_data_msg(self.recv(68)).data)
-            schedule = tuple(TariffSchedulePart(*skd_part) for skd_part in schedule)
+        for response in self.send_batch(list(self.__used_tariff_schedules.values())):
+            schedule = tools.parse_schedules(tools.parse_data_msg(response).data)
+            schedule = tuple(map(TariffSchedulePart._make, schedule))
             if schedule:
                 tariff_schedules.append(TariffSchedule(schedule))
         return tuple(tariff_schedules)
@@ -137,72 +241,55 @@ class MeterBase:
         """Cumulative active energy from the first start of measurement
         to the present (Total, T1, ..., T4) [kWh].
         """
-        self.send(tools.make_cmd_msg(self.obis_codes.active_energy))
-        return ActiveEnergy(*map(float, tools.parse_data_msg(self.recv(62)).data))
+        response, = self.send_batch([self._commands["active_energy"]])
+        return tools.parse_active_energy(response)
 
     @property
     def active_energy_last_month(self) -> ActiveEnergy:
         """Cumulative active energy for this month (Total, T1, ..., T4) [kWh]."""
-        zipped_values = zip(self.active_energy, self.__active_energy_prev_month)
-        calc_values = map(lambda x: round(x[0] - x[1], 2), zipped_values)
-        return ActiveEnergy(*calc_values)
+        return self.__active_energy_since("active_energy_prev_month")
 
     @property
     def active_energy_last_day(self) -> ActiveEnergy:
         """Cumulative active energy for this day (Total, T1, ..., T4) [kWh]."""
-        zipped_values = zip(self.active_energy, self.__active_energy_prev_day)
-        calc_values = map(lambda x: round(x[0] - x[1], 2), zipped_values)
-        return ActiveEnergy(*calc_values)
+        return self.__active_energy_since("active_energy_prev_day")
 
-    @property
-    def __active_energy_prev_month(self) -> ActiveEnergy:
-        """Cumulative active energy from the first start of measurement
-        to the beginning of this month (Total, T1, ..., T4) [kWh].
+    def __active_energy_since(self, prev_name: str) -> ActiveEnergy:
+        """Return the difference between the current active energy and the one
+        at the beginning of the period, both requested in a single batch.
         """
-        self.send(tools.make_cmd_msg(self.obis_codes.active_energy_prev_month))
-        return ActiveEnergy(*map(float, tools.parse_data_msg(self.recv(62)).data))
+        messages = [self._commands["active_energy"], self._commands[prev_name]]
+        current, prev = map(tools.parse_active_energy, self.send_batch(messages))
+        return ActiveEnergy._make([round(cur - old, 2) for cur, old in zip(current, prev)])
 
-    @property
-    def __active_energy_prev_day(self) -> ActiveEnergy:
-        """Cumulative active energy from the first start of measurement
-        to the beginning of this day (Total, T1, ..., T4) [kWh].
-        """
-        self.send(tools.make_cmd_msg(self.obis_codes.active_energy_prev_day))
-        return ActiveEnergy(*map(float, tools.parse_data_msg(self.recv(62)).data))
-
-    @property
-    def frequency(self) -> float:
-        """Supply frequency [Hz]."""
-        self.send(tools.make_cmd_msg(self.obis_codes.frequency))
-        return float(tools.parse_data_msg(self.recv(18)).data[0])
+    frequency = float_property("frequency", "Supply frequency [Hz].")
 
     @property
-    def date(self) -> datetime.date:
+    def date(self) -> date:
         """Current date on the meter."""
-        self.send(tools.make_cmd_msg(self.obis_codes.date))
-        date_str = tools.parse_data_msg(self.recv(19)).data[0]
-        return datetime.strptime(date_str, "%y%m%d").date()
+        date_str = self._read("date")[0]
+        # Fixed YYMMDD format, strptime is not needed
+        return date(2000 + int(date_str[:2]), int(date_str[2:4]), int(date_str[4:6]))
 
     @property
-    def time(self) -> datetime.time:
+    def time(self) -> time:
         """Current time on the meter."""
-        self.send(tools.make_cmd_msg(self.obis_codes.time))
-        time_str = tools.parse_data_msg(self.recv(19)).data[0]
-        return datetime.strptime(time_str, "%H%M%S").time()
+        time_str = self._read("time")[0]
+        return time(int(time_str[:2]), int(time_str[2:4]), int(time_str[4:6]))
 
     @property
     def datetime(self) -> datetime:
         """Current date and time on the meter."""
-        self.send(tools.make_cmd_msg(self.obis_codes.datetime))
-        datetime_str = tools.parse_data_msg(self.recv(25)).data[0]
-        return datetime.strptime(datetime_str, "%y%m%d%H%M%S")
+        datetime_str = self._read("datetime")[0]
+        return datetime(2000 + int(datetime_str[:2]), int(datetime_str[2:4]),
+                        int(datetime_str[4:6]), int(datetime_str[6:8]), int(datetime_str[8:10]),
+                        int(datetime_str[10:12]))
 
     @property
     def serial_number(self) -> str:
-        """Serial number of the meter."""
-        if not self.__serial_num:
-            self.send(tools.make_cmd_msg(self.obis_codes.serial_num))
-            self.__serial_num = tools.parse_data_msg(self.recv(21)).data[0]
+        """Serial number of the meter (read once)."""
+        if self.__serial_num is None:
+            self.__serial_num = self._read("serial_num")[0]
         return self.__serial_num
 
     @property
@@ -225,21 +312,18 @@ class MeterBase:
         """Address of the meter (may be the same as the serial number)."""
         if self.__address:
             return self.__address
-        self.send(tools.make_cmd_msg(self.obis_codes.address))
-        self.__address = tools.parse_data_msg(self.recv(21)).data[0]
+        self.__address = self._read("address")[0]
         return self.__address
 
     @property
     def firmware(self) -> str:
         """Meter firmware identifier."""
-        self.send(tools.make_cmd_msg(self.obis_codes.firmware_id))
-        return tools.parse_data_msg(self.recv(21)).data[0]
+        return self._read("firmware_id")[0]
 
     @property
     def temperature(self) -> int:
         """Meter temperature [°С]."""
-        self.send(tools.make_cmd_msg(self.obis_codes.temperature))
-        temp_str = tools.parse_data_msg(self.recv(16)).data[0]
+        temp_str = self._read("temperature")[0]
         if temp_str[0] == "1":
             temp_str = f"-{temp_str[1:]}"
         return int(temp_str)
@@ -249,7 +333,7 @@ class MeterBase:
             msg = tools.parse_id_msg(self.recv(21))
             self.__device_identifier = msg.identifier
         except ResponseError as e:
-            self.__session.__del__()
+            self.close()
             raise MeterConnectionError(e) from None
         return msg.baudrate_num
 
@@ -257,10 +341,10 @@ class MeterBase:
         try:
             # In my case the first (SOH) character is usually not received
             if self.__is_rfc2217:
-                pass_msg = self.recv(15)
+                pass_msg = bytearray(self.recv(15))
                 # If not received first (SOH) char
                 if pass_msg[0] != 1:
-                    pass_msg = b"\x01" + pass_msg
+                    pass_msg.insert(0, 1)
                 # If not received last (BCC) char
                 if pass_msg[-1] == 3:
                     pass_msg += self.recv(1)
@@ -270,7 +354,7 @@ class MeterBase:
             if not self.__password:
                 self.__password = tools.parse_password_msg(pass_msg)
         except (ResponseError, IndexError) as e:
-            self.__session.__del__()
+            self.close()
             raise MeterConnectionError(e) from None
 
     def __read_ack_msg(self):
@@ -280,22 +364,115 @@ class MeterBase:
                 msg += self.recv()
             tools.check_err(msg)
         except ResponseError as e:
-            self.__session.__del__()
+            self.close()
             raise MeterConnectionError(f"expected ACK message, but {e}") from None
         else:
             if msg != b"\x06":
-                self.__session.__del__()
+                self.close()
                 raise MeterConnectionError(f"expected ACK message, but received {msg}") from None
 
     def send(self, message: bytes):
         """Send sequence of bytes to meter."""
         self.__session.write(message)
 
+    def send_batch(self, messages: list[bytes]) -> list[bytes]:
+        """Send command messages to the meter and return their responses in
+        the same order.
+
+        In pipelined mode all messages are written at once and the responses
+        are read back-to-back, otherwise each message waits for its response.
+        Pipelining requires a meter that accepts a command while still
+        answering the previous one. The batches sent from several threads
+        (e.g. the background requests) are serialized.
+        """
+        with self.__lock:
+            # Leftovers of an earlier exchange must not be taken for the responses
+            self.__rx_buffer.clear()
+            if not self.__pipelined:
+                responses = []
+                for message in messages:
+                    self.send(message)
+                    responses.append(self.__read_frame())
+                return responses
+            self.send(b"".join(messages))
+            return [self.__read_frame() for _ in messages]
+
+    def read_many(self, obis_codes: list[str], return_errors: bool = False
+                  ) -> tuple[Union[DataMsg, ResponseError], ...]:
+        """Read several raw OBIS codes, return parsed data messages.
+        If return_errors is set, the error of an incorrect response (e.g. for
+        an unsupported code) is returned in its place instead of being raised.
+        """
+        responses = self.send_batch([tools.make_cmd_msg(code) for code in obis_codes])
+        if not return_errors:
+            return tuple(tools.parse_data_msg(resp) for resp in responses)
+        return tuple(map(_parse_data_msg_or_error, responses))
+
+    def submit(self, *obis_codes: str) -> "Future[tuple[DataMsg, ...]]":
+        """Read raw OBIS codes like read_many, but in the background.
+        Return a future of the parsed data messages.
+        """
+        return self.run_in_background(self.read_many, list(obis_codes))
+
+    def run_in_background(self, fn: Callable, *args) -> "Future":
+        """Call fn with args in the worker thread of the meter, return a future
+        of its result (e.g. to read a prepared value: run_in_background(getattr,
+        meter, "voltage")).
+        There is a single worker, so the requests are sent in submission order.
+        They do not interleave on the line with the reads from other threads
+        either, each exchange holds the lock of the meter.
+        """
+        if self.__executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.__executor = ThreadPoolExecutor(max_workers=1,
+                                                 thread_name_prefix=type(self).__name__)
+        return self.__executor.submit(fn, *args)
+
+    def _read(self, name: str) -> tuple[str, ...]:
+        """Send the prepared command message by name, return the data of the
+        response.
+        """
+        response, = self.send_batch([self._commands[name]])
+        return tools.parse_data_msg(response).data
+
+    def _read_floats(self, *names: str) -> list[float]:
+        """Request prepared OBIS commands by name in one batch, return the
+        first value of each response converted to float.
+        """
+        responses = self.send_batch([self._commands[name] for name in names])
+        return [float(tools.parse_data_msg(resp).data[0]) for resp in responses]
+
+    def __read_frame(self) -> bytes:
+        """Read data message up to the ETX char and the following BCC.
+
+        The bytes waiting in the input buffer are read at once rather than one
+        by one, whatever follows the message is kept for the next call (the
+        next response in pipelined mode). If the message is not received
+        before timeout, the buffers are reset so that the rest of the broken
+        message does not precede the next one.
+        """
+        buffer = self.__rx_buffer
+        start = 0
+        while True:
+            end = buffer.find(b"\x03", start)
+            if end != -1 and end + 1 < len(buffer):
+                frame = bytes(buffer[:end + 2])
+                del buffer[:end + 2]
+                return frame
+            start = len(buffer) if end == -1 else end
+            chunk = self.__session.read(max(1, self.__session.in_waiting))
+            if not chunk:
+                frame = bytes(buffer)
+                buffer.clear()
+                self.__session.reset_input_buffer()
+                return frame
+            buffer += chunk
+
     def recv(self, size: int = None, expected: bytes = b"\x03") -> bytes:
         """Read sequence of bytes from the meter.
 
-        If expected == None and size == None and session by RFC2217 protocol,
-        the RawIOBase.readall method is called (read all bytes before timeout).
+        If expected == None and size == None, the RawIOBase.readall method is
+        called (read all bytes before timeout).
 
         Args:
             size: size of bytes, None by default.
@@ -303,36 +480,39 @@ class MeterBase:
                  size bytes).
             expected: expected sequence, ETX char by default.
                 If specified, SerialBase.read_until method is called (reads
-                until an expected sequence is found).
+                until an expected sequence is found). If it is ETX char,
+                the BCC char following it is read as well.
 
         Returns:
             sequence of bytes
-
-        Raises:
-            ResponseError: if `expected` is ETX character, but the last
-             2 chars are not received.
         """
-        if (self.__is_rfc2217 or not expected) and not size:
-            return self.__session.readall()
-        elif size:
+        # Only the sign-on handshake passes the size, its messages are not framed by ETX
+        if size:
             return self.__session.read(size)
-        elif expected:
-            resp = self.__session.read_until(expected)
-            if expected == b"\x03":
-                try:
-                    resp += expected
-                    resp += tools.calculate_bcc(resp[1:])
-                except IndexError:
-                    raise ResponseError(f"invalid response format, response: {resp}") from None
-            self.__session.flushInput()
-            return resp
+        elif not expected:
+            return self.__session.readall()
+        elif expected == b"\x03":
+            return self.__read_frame()
+        else:
+            return self.__session.read_until(expected)
 
     def close_session(self):
+        # The break message must not overtake the background requests
+        self.__stop_executor()
         self.send(b"\x01B0\x03q")
         self.__session.flush()
 
-    def __del__(self):
-        self.__session.__del__()
+    def close(self):
+        """Close the serial port, the port object closes it on collection too.
+        The background requests that were already submitted are completed first.
+        """
+        self.__stop_executor()
+        self.__session.close()
+
+    def __stop_executor(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
 
     def __str__(self) -> str:
         return f"[{self.identifier} : {self.address}]"
@@ -347,4 +527,94 @@ class MeterBase:
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.close_session()
-        self.__del__()
+        self.close()
+
+
+class MeterPool:
+    """Several meters with their sessions kept open between polls.
+    Each meter is read in its own thread, so the meters on different ports
+    are polled concurrently while the requests to one meter stay sequential.
+    """
+
+    def __init__(self, meters: list[MeterBase]):
+        self.meters = list(meters)
+        self.__executor = None
+        self.__stack = None
+
+    def snapshot(self, name: str) -> list:
+        """Return the prepared value by name from every meter (in the order of meters)."""
+        if self.__executor is None:
+            raise RuntimeError("MeterPool is not entered")
+        return self.__map(lambda meter: getattr(meter, name))
+
+    def __map(self, fn: Callable[[MeterBase], Any]) -> list:
+        return list(self.__executor.map(fn, self.meters))
+
+    def __enter__(self):
+        from concurrent.futures import ThreadPoolExecutor, wait
+        self.__executor = ThreadPoolExecutor(max_workers=max(len(self.meters), 1),
+                                             thread_name_prefix=type(self).__name__)
+        try:
+            with ExitStack() as stack:
+                futures = [self.__executor.submit(meter.start_session) for meter in self.meters]
+                # Every sign-on must be over before any port is closed
+                wait(futures)
+                errors = []
+                for meter, future in zip(self.meters, futures):
+                    exc = future.exception()
+                    if exc is None:
+                        # Signed off by its __exit__
+                        stack.push(meter)
+                    else:
+                        stack.callback(meter.close)
+                        errors.append(exc)
+                if errors:
+                    raise errors[0]
+                self.__stack = stack.pop_all()
+        except BaseException:
+            self.__stop_executor()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.__stack.__exit__(exc_type, exc_value, traceback)
+        finally:
+            self.__stack = None
+            self.__stop_executor()
+
+    def __stop_executor(self):
+        self.__executor.shutdown()
+        self.__executor = None
+
+
+def _parse_data_msg_or_error(response: bytes) -> Union[DataMsg, ResponseError]:
+    try:
+        return tools.parse_data_msg(response)
+    except ResponseError as e:
+        return e
+
+
+def _collect_prepared_values(cls: type) -> tuple[str, ...]:
+    """Return sorted names of the public properties of the meter class."""
+    return tuple(sorted({name for klass in cls.__mro__ for name, attr in vars(klass).items()
+                         if isinstance(attr, property)
+                         and not name.startswith("_")}))
+
+
+def _make_commands(obis_codes: OBISCodes) -> dict[str, bytes]:
+    """Return command messages for the OBIS codes (except templates)."""
+    return {name: tools.make_cmd_msg(code) for name, code in vars(obis_codes).items()
+            if code and "%" not in code}
+
+
+def _make_tariff_commands(template: str) -> dict[int, bytes]:
+    """Return command messages for the tariff schedules 1-8."""
+    return {num: tools.make_cmd_msg(template % f"{num:02X}") for num in range(1, 9)}
+
+
+# Command messages are built once per set of OBIS codes, subclasses that
+# override obis_codes get their own in __init_subclass__
+MeterBase.prepared_values = _collect_prepared_values(MeterBase)
+MeterBase._commands = _make_commands(MeterBase.obis_codes)
+MeterBase._tariff_commands = _make_tariff_commands(MeterBase.obis_codes.tariff_schedule)
@@ -1,25 +1,36 @@
 import re
+from functools import lru_cache
 from re import Match
 from time import sleep
 from typing import Literal
 
 import serial
 
-from . import meters
-from .types import IdentificationMsg, DataMsg, WrongBCC, ResponseError
+from .types import IdentificationMsg, DataMsg, WrongBCC, ResponseError, ActiveEnergy
+
+_id_msg_pattern = re.compile(b"^\\/(?P<vendor>[A-Z]{2}([A-Z]|[a-z]))(?P<baudrate>[0-5])"
+                             b"(?P<identifier>[\x22-\x2E\x30-\x7E]{1,16})\r\n$")
+_password_msg_pattern = re.compile(b"^\x01P0\x02\\((?P<data>.*)\\)\x03(?P<bcc>[\x00-\xff])$")
+_data_msg_pattern = re.compile(b"^\x02(?P<addr>[0-9A-F]{8})\\((?P<data>.*)\\)\x03"
+                               b"(?P<bcc>[\x00-\xff])$")
+_err_msg_pattern = re.compile(b"^\x02\\((?P<err>[0-9]+)\\)\x03[\x00-\xff]$")
+_obis_pattern = re.compile(r"({a})\.({a})\.({a})\*({a})".format(a="[A-F0-9]{2}"))
+# One-byte BCC objects, calculate_bcc returns them without building new bytes
+_bcc_chars = tuple(bytes((char,)) for char in range(256))
+_modes = ("P", "W", "R")
 
 
 def make_cmd_msg(obis: str = "", mode: Literal["P", "W", "R"] = "R", data: bytes = b"") -> bytes:
     """Return generated byte command message from OBIS code or password
     comparison message.
     """
-    if type(obis) != str:
+    if not isinstance(obis, str):
         raise TypeError(f"OBIS must be str, not {type(obis).__name__}")
 
-    if type(data) != bytes:
+    if not isinstance(data, bytes):
         raise TypeError(f"data must be bytes, not {type(data).__name__}")
 
-    if mode not in ("P", "W", "R"):
+    if mode not in _modes:
         raise ValueError(f"mode must be in ('P', 'W', 'R'), not {mode!r}")
 
     if mode in ("P", "W") and not data:
@@ -31,25 +42,31 @@ def make_cmd_msg(obis: str = "", mode: Literal["P", "W", "R"] = "R", data: bytes
     if obis and mode == "P":
         raise ValueError("mode cannot be 'P' if OBIS code was specified")
 
-    if obis:
-        pattern = re.compile(r"({a})\.({a})\.({a})\*({a})".format(a="[A-F0-9]{2}"))
-        obis = pattern.fullmatch(obis)
-        if not obis:
-            raise ValueError("OBIS code format is wrong")
-        obis = obis[1] + obis[2] + obis[3] + obis[4]
+    if obis and not _obis_pattern.fullmatch(obis):
+        raise ValueError("OBIS code format is wrong")
+
+    if mode == "P":
+        # Passwords are not kept in the cache
+        return _build_cmd_msg(obis, mode, data)
+    return _build_cached_cmd_msg(obis, mode, data)
 
+
+def _build_cmd_msg(obis: str, mode: str, data: bytes) -> bytes:
+    obis = obis.replace(".", "").replace("*", "")
     msg = b"\x01%s1\x02%s(%s)\x03" % (mode.encode(), obis.encode(), data)
     msg += calculate_bcc(msg[1:])
     return msg
 
 
+# Built from the same OBIS codes over and over (CLI, read_many, schedules), the arguments
+# are validated (and hashable) by make_cmd_msg
+_build_cached_cmd_msg = lru_cache(maxsize=256)(_build_cmd_msg)
+
+
 def parse_id_msg(response: bytes) -> IdentificationMsg:
-    if not isinstance(response, bytes):
+    if not isinstance(response, (bytes, bytearray)):
         raise TypeError(f"response must be bytes, not {type(response).__name__}")
-    pattern = b"^\\/(?P<vendor>[A-Z]{2}([A-Z]|[a-z]))(?P<baudrate>[0-5])(?P<identifier>" \
-              b"[\x22-\x2E\x30-\x7E]{1,16})\r\n$"
-    pattern = re.compile(pattern)
-    id_msg = pattern.fullmatch(response)
+    id_msg = _id_msg_pattern.fullmatch(response)
     if not id_msg:
         check_err(response)
         raise ResponseError(f"invalid identification message format, msg: {response}")
@@ -60,11 +77,9 @@ def parse_id_msg(response: bytes) -> IdentificationMsg:
 
 
 def parse_password_msg(response: bytes) -> bytes:
-    if not isinstance(response, bytes):
+    if not isinstance(response, (bytes, bytearray)):
         raise TypeError(f"response must be bytes, not {type(response).__name__}")
-    pattern = b"^\x01P0\x02\\((?P<data>.*)\\)\x03(?P<bcc>[\x00-\xff])$"
-    pattern = re.compile(pattern)
-    pass_msg = pattern.fullmatch(response)
+    pass_msg = _password_msg_pattern.fullmatch(response)
     if not pass_msg:
         check_err(response)
         raise ResponseError(f"invalid password message format, msg: {response}")
@@ -73,34 +88,50 @@ def parse_password_msg(response: bytes) -> bytes:
 
 
 def parse_data_msg(response: bytes) -> DataMsg:
-    if not isinstance(response, bytes):
+    data_msg = _match_data_msg(response)
+    data = tuple(data_msg["data"].decode("ascii").split(","))
+    address = data_msg["addr"].decode("ascii")
+    address = f"{address[:2]}.{address[2:4]}.{address[4:6]}*{address[6:]}"
+    return DataMsg(data=data, address=address)
+
+
+def parse_active_energy(response: bytes) -> ActiveEnergy:
+    """Return active energy (Total, T1, ..., T4) from the data message.
+    The values are converted to float directly from bytes.
+    """
+    return ActiveEnergy._make(map(float, _match_data_msg(response)["data"].split(b",")))
+
+
+def _match_data_msg(response: bytes) -> Match[bytes]:
+    if not isinstance(response, (bytes, bytearray)):
         raise TypeError(f"response must be bytes, not {type(response).__name__}")
-    pattern = b"^\x02(?P<addr>[0-9A-F]{8})\\((?P<data>.*)\\)\x03(?P<bcc>[\x00-\xff])$"
-    pattern = re.compile(pattern)
-    data_msg = pattern.fullmatch(response)
+    data_msg = _data_msg_pattern.fullmatch(response)
     if not data_msg:
         check_err(response)
         raise ResponseError(f"invalid data message format, msg: {response}")
     check_bcc(data_msg)
-    data = tuple(val.decode("ascii") for val in data_msg["data"].split(b","))
-    address = data_msg["addr"].decode("ascii")
-    address = f"{address[:2]}.{address[2:4]}.{address[4:6]}*{address[6:]}"
-    return DataMsg(data=data, address=address)
+    return data_msg
 
 
 def parse_schedules(schedules: tuple[str, ...]) -> tuple[tuple[int, ...], ...]:
     schedules_parsed = []
-    from textwrap import wrap
     for skd in schedules:
-        if int(skd):
-            schedules_parsed.append(tuple(int(skd_split) for skd_split in wrap(skd, 2)))
+        if len(skd) % 2 or not skd.isdigit():
+            raise ResponseError(f"invalid schedule format, schedule: {skd}")
+        # Schedules consist of two-digit fields, they are split off the number
+        # that is parsed anyway to skip the empty (all zeros) schedules
+        num = int(skd)
+        if num:
+            fields = []
+            for _ in range(len(skd) // 2):
+                num, field = divmod(num, 100)
+                fields.append(field)
+            schedules_parsed.append(tuple(reversed(fields)))
     return tuple(schedules_parsed)
 
 
 def check_err(response: bytes):
-    pattern = b"^\x02\\((?P<err>[0-9]+)\\)\x03[\x00-\xff]$"
-    pattern = re.compile(pattern)
-    response = pattern.fullmatch(response)
+    response = _err_msg_pattern.fullmatch(response)
     if response:
         err = response['err'].decode('ascii')
         raise ResponseError(f"error message received, error code: {err}")
@@ -115,22 +146,33 @@ def check_bcc(msg: Match[bytes]):
 
 def calculate_bcc(data: bytes) -> bytes:
     """Return calculated BCC (block check character)."""
-    if type(data) != bytes:
+    if not isinstance(data, (bytes, bytearray)):
         raise TypeError(f"data must be bytes, not {type(data).__name__}")
+    if len(data) > 64:
+        # XOR the halves of the data as one big integer until a byte is left:
+        # a few C-level operations instead of a Python step per byte
+        bcc = int.from_bytes(data, "little")
+        size = len(data)
+        while size > 1:
+            half = (size + 1) // 2
+            bcc = (bcc >> 8 * half) ^ (bcc & ((1 << 8 * half) - 1))
+            size = half
+        return _bcc_chars[bcc]
     bcc = 0
     for byte in data:
         bcc ^= byte
-    return chr(bcc).encode("ascii")
+    return _bcc_chars[bcc]
 
 
 def start_without_model(interface: str, address: str = "", password: str = "",
                         initial_baudrate: int = 300, do_not_open: bool = False):
+    from . import meters
     session = serial.serial_for_url(url=interface, baudrate=initial_baudrate,
                                     bytesize=serial.SEVENBITS, parity=serial.PARITY_EVEN,
                                     stopbits=serial.STOPBITS_ONE, timeout=3)
     session.write(b"/?%s!\r\n" % address.encode("ascii"))
     ident = parse_id_msg(session.read(21)).identifier
-    session.__del__()
+    session.close()
     ident = ident[6:12]
     if ident == "324.11":
         klass = meters.NevaMT324AOS
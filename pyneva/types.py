@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import NamedTuple
+from typing import NamedTuple, Union
 
 
 class DataMsg(NamedTuple):
@@ -33,10 +33,18 @@ class Current(NamedTuple):
     l3: float
 
 
+class PowerFactorValue(NamedTuple):
+    kind: str  # C - capacitive, L - inductive, ? - undefined
+    value: float
+
+    def __str__(self) -> str:
+        return f"{self.kind}{self.value}"
+
+
 class PowerFactor(NamedTuple):
-    l1: str
-    l2: str
-    l3: str
+    l1: Union[PowerFactorValue, float]
+    l2: Union[PowerFactorValue, float]
+    l3: Union[PowerFactorValue, float]
 
 
 class ActivePower(NamedTuple):
@@ -81,7 +89,7 @@ class TariffSchedule(NamedTuple):
     parts: tuple[TariffSchedulePart, ...]
 
 
-@dataclass
+@dataclass(frozen=True)
 class OBISCodes:
     serial_num: str
     firmware_id: str
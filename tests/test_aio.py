@@ -0,0 +1,25 @@
+import asyncio
+import unittest
+
+import serial
+
+from pyneva import AsyncMeter, NevaMT324AOS
+from pyneva.types import MeterConnectionError
+
+
+class TestAsyncMeter(unittest.TestCase):
+    def test_failed_sign_on(self):
+        # Nothing answers on a loopback port, do not wait for the replies long
+        meter = NevaMT324AOS("loop://", timeout=.1)
+
+        async def sign_on():
+            async with AsyncMeter(meter):
+                pass
+
+        self.assertRaises(MeterConnectionError, asyncio.run, sign_on())
+        # The port is closed
+        self.assertRaises(serial.SerialException, meter.send, b"\x06")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,291 @@
+import unittest
+from threading import Barrier, Event
+from time import sleep
+
+from pyneva import MeterPool, NevaMT324AOS, NevaMT324R
+from pyneva.tools import calculate_bcc, make_cmd_msg
+from pyneva.types import ActiveEnergy, MeterConnectionError, PowerFactorValue, ResponseError, \
+    TariffSchedule, TariffSchedulePart
+
+
+def data_msg(addr: bytes, data: bytes) -> bytes:
+    body = b"%s(%s)\x03" % (addr, data)
+    return b"\x02" + body + calculate_bcc(body)
+
+
+class PoolMeter(NevaMT324AOS):
+    """Meter that records the session calls instead of signing on."""
+
+    def __init__(self, value: int, delay: float = 0, fail: bool = False,
+                 failure: Event = None, barrier: Barrier = None):
+        super().__init__("loop://")
+        self.value_ = value
+        self.delay = delay
+        self.fail = fail
+        # Set by the failing meter, the others finish signing on after it
+        self.failure = failure
+        # Waited for by every read, so the reads must run concurrently
+        self.barrier = barrier
+        self.calls = []
+        self.reads = 0
+
+    @property
+    def value(self) -> int:
+        sleep(self.delay)
+        return self.value_
+
+    def _read(self, name: str) -> tuple[str, ...]:
+        self.reads += 1
+        self.barrier.wait()
+        return str(self.value_),
+
+    def start_session(self):
+        sleep(self.delay)
+        self.calls.append("start_session")
+        if self.fail:
+            self.failure.set()
+            raise MeterConnectionError("no reply")
+        if self.failure is not None:
+            self.failure.wait(5)
+
+    def close_session(self):
+        self.calls.append("close_session")
+
+    def close(self):
+        self.calls.append("close")
+
+
+class TestPackage(unittest.TestCase):
+    def test_star_import(self):
+        namespace = {}
+        exec("from pyneva import *", namespace)
+        self.assertIs(namespace["NevaMT324AOS"], NevaMT324AOS)
+        self.assertIs(namespace["NevaMT324R"], NevaMT324R)
+        self.assertIs(namespace["MeterPool"], MeterPool)
+        self.assertIn("start_without_model", namespace)
+
+
+class TestMeterPool(unittest.TestCase):
+    def test_snapshot(self):
+        meters = [PoolMeter(1, delay=.2), PoolMeter(2, delay=.1), PoolMeter(3)]
+        pool = MeterPool(meters)
+        self.assertRaises(RuntimeError, pool.snapshot, "value")
+
+        with pool:
+            self.assertEqual(pool.snapshot("value"), [1, 2, 3])
+        for meter in meters:
+            self.assertEqual(meter.calls, ["start_session", "close_session", "close"])
+
+    def test_concurrent_serial_number(self):
+        # The barrier is broken if the meters are read one after another
+        barrier = Barrier(4, timeout=5)
+        meters = [PoolMeter(num, barrier=barrier) for num in range(4)]
+        with MeterPool(meters) as pool:
+            self.assertEqual(pool.snapshot("serial_number"), ["0", "1", "2", "3"])
+            self.assertEqual(pool.snapshot("serial_number"), ["0", "1", "2", "3"])
+        self.assertEqual([meter.reads for meter in meters], [1] * 4)
+
+    def test_start_failure(self):
+        # The failure is raised while the other meter is still signing on
+        failure = Event()
+        started = PoolMeter(1, failure=failure)
+        failed = PoolMeter(2, fail=True, failure=failure)
+        with self.assertRaises(MeterConnectionError):
+            with MeterPool([started, failed]):
+                self.fail("the pool must not be entered")
+        self.assertEqual(started.calls, ["start_session", "close_session", "close"])
+        self.assertEqual(failed.calls, ["start_session", "close"])
+
+
+class LoopbackTestCase(unittest.TestCase):
+    """Meter signed on over a loopback port. The port echoes the writes, so
+    the replies are written instead of the commands.
+    """
+
+    sign_on = [b"/TPC5NEVAMT324.1106\r\n", b"\x01P0\x02(00000000)\x03`", b"\x06"]
+
+    def setUp(self):
+        # The ACK wire time is waited out at the initial baudrate
+        self.meter = NevaMT324R("loop://", initial_baudrate=9600)
+        self.write = self.meter.send
+        self.meter.send = self.reply
+        self.sent = []
+        self.replies = list(self.sign_on)
+        self.meter.start_session()
+        self.sent.clear()
+
+    def tearDown(self):
+        self.meter.close()
+
+    def reply(self, message: bytes):
+        """Write the next reply, or the one to the message if the replies are a dict."""
+        self.sent.append(message)
+        if isinstance(self.replies, list):
+            self.write_reply(self.replies.pop(0))
+        else:
+            self.write_reply(self.replies[message])
+
+    def write_reply(self, reply: bytes):
+        self.write(reply)
+
+
+class TestFramedReads(LoopbackTestCase):
+    def test_read(self):
+        self.replies = [
+            b"\x02(12)\x03" + calculate_bcc(b"(12)\x03"),
+            data_msg(b"200700FF", b"0233.81"),
+            data_msg(b"0F0880FF", b"016484.51,012896.28,003588.23,000000.00,000000.00"),
+            data_msg(b"2107FFFF", b"1.950"),
+        ]
+        self.assertRaises(ResponseError, getattr, self.meter, "frequency")
+        self.assertEqual(self.meter.voltage_l1, 233.81)
+        self.assertEqual(self.meter.active_energy,
+                         ActiveEnergy(total=16484.51, T1=12896.28, T2=3588.23, T3=0.0, T4=0.0))
+        self.assertEqual(str(self.meter.power_factor_l1), "L0.95")
+
+    def test_power_factor(self):
+        self.replies = [data_msg(b"2107FFFF", b"0.950"), data_msg(b"2107FFFF", b"5.950")]
+        self.assertEqual(self.meter.power_factor_l1, PowerFactorValue("C", .95))
+        self.assertRaises(ResponseError, getattr, self.meter, "power_factor_l1")
+
+    def test_read_many(self):
+        ok = data_msg(b"600100FF", b"60089784")
+        err = b"\x02(12)\x03" + calculate_bcc(b"(12)\x03")
+        codes = ["60.01.00*FF", "99.99.99*FF", "60.01.00*FF"]
+
+        self.replies = [ok, err, ok]
+        msgs = self.meter.read_many(codes, return_errors=True)
+        self.assertEqual([msg.data for msg in (msgs[0], msgs[2])], [("60089784",)] * 2)
+        self.assertIsInstance(msgs[1], ResponseError)
+
+        self.replies = [ok, err, ok]
+        self.assertRaises(ResponseError, self.meter.read_many, codes)
+
+
+class TestReadTimeout(unittest.TestCase):
+    def test_read_timeout(self):
+        meter = NevaMT324R("loop://")
+        self.assertAlmostEqual(meter._read_timeout(300), 1.6)
+        self.assertAlmostEqual(meter._read_timeout(9600), 1.503125)
+        # Never looser than the timeout before the sign-on
+        self.assertEqual(meter._read_timeout(1), 3)
+        self.assertEqual(NevaMT324R("loop://", timeout=1)._read_timeout(9600), 1)
+
+
+class TestStatus(unittest.TestCase):
+    def test_status(self):
+        meter = NevaMT324AOS("loop://")
+        for word, flags in (("8000", {"bodyIsOpen"}), ("0100", set()),
+                            ("0001", {"paramMemoryFailure"}),
+                            ("0280", {"wrongWired", "dataMemoryICWorkError"})):
+            meter._read = lambda name, word=word: (word,)
+            status = meter.status
+            self.assertEqual(len(status), 15)
+            self.assertEqual({name for name, is_set in status.items() if is_set}, flags)
+
+        # Every flag but the unused bit 8
+        meter._read = lambda name: ("FEFF",)
+        self.assertTrue(all(meter.status.values()))
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.meter = NevaMT324R("loop://")
+        self.reads = []
+        self.batches = []
+        self.meter._read = self.read
+        self.meter.send_batch = self.send_batch
+
+    def read(self, name: str) -> tuple[str, ...]:
+        self.reads.append(name)
+        if name == "seasonal_schedules":
+            return "0101010101", "0000000000"
+        return "010103", "000000"
+
+    def send_batch(self, messages: list[bytes]) -> list[bytes]:
+        self.batches.append(messages)
+        return [data_msg(b"0A0164FF", b"000001,070002") for _ in messages]
+
+    def test_cached(self):
+        calls = []
+        fetch = lambda: calls.append(None) or len(calls)
+        self.assertEqual(self.meter._cached("key", fetch), 1)
+        self.assertEqual(self.meter._cached("key", fetch), 1)
+        sleep(.02)
+        self.assertEqual(self.meter._cached("key", fetch, ttl=.01), 2)
+        self.meter.invalidate_cache()
+        self.assertEqual(self.meter._cached("key", fetch), 3)
+
+    def test_schedules(self):
+        seasonal = self.meter.seasonal_schedules
+        self.assertEqual(self.meter.seasonal_schedules, seasonal)
+        self.assertEqual(self.reads, ["seasonal_schedules"])
+
+        tariff = self.meter.tariff_schedules
+        self.assertEqual(self.meter.tariff_schedules, tariff)
+        self.assertEqual(len(tariff), 1)
+        self.assertEqual(self.batches, [[self.meter._tariff_commands[1]]])
+
+        # A new schedule number is used, the tariff schedules are read again
+        self.meter.special_days_schedules
+        self.assertEqual(len(self.meter.tariff_schedules), 2)
+        self.assertEqual(self.batches[1], [self.meter._tariff_commands[1],
+                                           self.meter._tariff_commands[3]])
+
+        # The numbers used before the invalidation are not requested any more
+        self.meter.invalidate_cache()
+        self.assertEqual(len(self.meter.tariff_schedules), 1)
+        self.assertEqual(self.batches[2], [self.meter._tariff_commands[1]])
+        self.meter.seasonal_schedules
+        self.assertEqual(self.reads, ["seasonal_schedules", "special_days_schedules",
+                                      "seasonal_schedules"])
+
+
+class TestTariffSchedules(LoopbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.replies = {
+            self.meter._commands["seasonal_schedules"]:
+                data_msg(b"0D0000FF", b"0101010112,0601020102,0000000000"),
+            make_cmd_msg("0A.01.64*FF"): data_msg(b"0A0164FF", b"000001,070002"),
+            make_cmd_msg("0A.02.64*FF"): data_msg(b"0A0264FF", b"000000,000000"),
+            make_cmd_msg("0A.0C.64*FF"): data_msg(b"0A0C64FF", b"000003"),
+        }
+
+    def test_tariff_schedules(self):
+        self.assertEqual(len(self.meter.seasonal_schedules), 2)
+        self.assertEqual(
+            self.meter.tariff_schedules,
+            (TariffSchedule((TariffSchedulePart(0, 0, 1), TariffSchedulePart(7, 0, 2))),
+             TariffSchedule((TariffSchedulePart(0, 0, 3),))),
+        )
+        # In the order the schedule numbers were met, the empty schedule 2 is dropped
+        self.assertEqual(self.sent, [self.meter._commands["seasonal_schedules"],
+                                     self.meter._tariff_commands[1],
+                                     make_cmd_msg("0A.0C.64*FF"),
+                                     self.meter._tariff_commands[2]])
+
+
+class TestBackgroundReads(LoopbackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.replies = {
+            make_cmd_msg("60.01.00*FF"): data_msg(b"600100FF", b"60089784"),
+            self.meter._commands["voltage_l1"]: data_msg(b"200700FF", b"0233.81"),
+        }
+
+    def write_reply(self, reply: bytes):
+        # The reply arrives in parts, so that an unserialized exchange could overtake it
+        self.write(reply[:5])
+        sleep(.005)
+        self.write(reply[5:])
+
+    def test_mixed_reads(self):
+        future = self.meter.submit(*["60.01.00*FF"] * 20)
+        voltages = [self.meter.voltage_l1 for _ in range(20)]
+        self.assertEqual(voltages, [233.81] * 20)
+        self.assertEqual({msg.data for msg in future.result()}, {("60089784",)})
+
+
+if __name__ == '__main__':
+    unittest.main()
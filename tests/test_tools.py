@@ -1,8 +1,9 @@
 import unittest
 
 from pyneva.tools import make_cmd_msg, parse_data_msg, parse_id_msg, parse_password_msg, \
-    parse_schedules, calculate_bcc
-from pyneva.types import SeasonalSchedule, IdentificationMsg, ResponseError, WrongBCC
+    parse_schedules, calculate_bcc, parse_active_energy, _build_cached_cmd_msg
+from pyneva.types import SeasonalSchedule, IdentificationMsg, ResponseError, WrongBCC, \
+    ActiveEnergy
 
 
 class TestTools(unittest.TestCase):
@@ -17,9 +18,17 @@ class TestTools(unittest.TestCase):
         )
         self.assertEqual(first, second)
 
+        # Passwords are not cached
+        cached = _build_cached_cmd_msg.cache_info().currsize
+        make_cmd_msg(mode="P", data=b"12345678")
+        self.assertEqual(_build_cached_cmd_msg.cache_info().currsize, cached)
+
         self.assertRaises(TypeError, make_cmd_msg, obis=b"60.01.00*FF")
         self.assertRaises(TypeError, make_cmd_msg, obis=435)
         self.assertRaises(TypeError, make_cmd_msg, mode="W", data=12231)
+        self.assertRaisesRegex(TypeError, "data must be bytes", make_cmd_msg, mode="W",
+                               data=bytearray(b"1"))
+        self.assertRaises(ValueError, make_cmd_msg, obis="60.01.00*FF", mode=["R"])
         self.assertRaises(ValueError, make_cmd_msg, obis="60.01.00*FF", mode="L")
         self.assertRaises(ValueError, make_cmd_msg, mode="W")
         self.assertRaises(ValueError, make_cmd_msg, mode="P")
@@ -52,6 +61,18 @@ class TestTools(unittest.TestCase):
         self.assertRaises(WrongBCC, parse_data_msg, response=b"\x020F0880FF(016442.17,012865.25,00"
                                                              b"3576.92,000000.00,000000.00)\x03S")
 
+    def test_parse_active_energy(self):
+        first = parse_active_energy(b"\x020F0680FF(04.8190,04.8457,02.5359,00.0000,00.0000)\x03R")
+        second = ActiveEnergy(total=4.819, T1=4.8457, T2=2.5359, T3=0.0, T4=0.0)
+        self.assertEqual(first, second)
+
+        self.assertRaises(TypeError, parse_active_energy, response="abc")
+        self.assertRaises(ResponseError, parse_active_energy, response=b"\x02(12)\x03\x01")
+        # Invalid BCC
+        self.assertRaises(WrongBCC, parse_active_energy, response=b"\x020F0880FF(016442.17,0128"
+                                                                  b"65.25,003576.92,000000.00,00"
+                                                                  b"0000.00)\x03S")
+
     def test_parse_id_msg(self):
         first = (
             parse_id_msg(b"/TPC5NEVAMT324.1106\r\n"),
@@ -78,11 +99,13 @@ class TestTools(unittest.TestCase):
             parse_password_msg(b"\x01P0\x02(00000000)\x03`"),
             parse_password_msg(b"\x01P0\x02(9)\x03Y"),
             parse_password_msg(b"\x01P0\x02()\x03`"),
+            parse_password_msg(bytearray(b"\x01P0\x02(00000000)\x03`")),
         )
         second = (
             b"00000000",
             b"9",
             b"",
+            b"00000000",
         )
         self.assertEqual(first, second)
 
@@ -120,6 +143,9 @@ class TestTools(unittest.TestCase):
         )
         self.assertEqual(first, second)
 
+        for skd in ("123", " 12", "+1", "1_2", "0a"):
+            self.assertRaises(ResponseError, parse_schedules, (skd,))
+
     def test_calculate_bcc(self):
         first = (
             calculate_bcc(b"60010AFF(0000000000000000)\x03"),
@@ -128,6 +154,20 @@ class TestTools(unittest.TestCase):
         second = (b"t", b"\x15",)
         self.assertEqual(first, second)
 
+        # Long data (special days schedules), odd and even length
+        for data in (b"0B0000FF(" + b"010101," * 31 + b"000000)\x03",
+                     b"0B0000FF(" + b"010102," * 31 + b"0000001)\x03"):
+            bcc = 0
+            for byte in data:
+                bcc ^= byte
+            self.assertEqual(calculate_bcc(data), bytes((bcc,)))
+
+        # Not ASCII
+        self.assertEqual(calculate_bcc(b"\x01\xfe"), b"\xff")
+
+        self.assertEqual(calculate_bcc(bytearray(b"R1\x0260010AFF()\x03")), b"\x15")
+        self.assertEqual(calculate_bcc(bytearray(data)), bytes((bcc,)))
+
         self.assertRaises(TypeError, calculate_bcc, data=123)
 
 